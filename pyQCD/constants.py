@@ -0,0 +1,78 @@
+"""Numerical and labelling constants used by the correlator loading and
+analysis routines.
+
+The gamma matrix conventions follow the DeGrand-Rossi (chiral) basis used by
+Chroma, with gamma5 defined as the product gamma1 gamma2 gamma3 gamma4.
+"""
+
+from __future__ import absolute_import
+
+import numpy as np
+
+
+identity = np.identity(4, dtype=np.complex128)
+
+gamma1 = np.array([[0, 0, 0, 1j],
+                   [0, 0, 1j, 0],
+                   [0, -1j, 0, 0],
+                   [-1j, 0, 0, 0]], dtype=np.complex128)
+
+gamma2 = np.array([[0, 0, 0, -1],
+                   [0, 0, 1, 0],
+                   [0, 1, 0, 0],
+                   [-1, 0, 0, 0]], dtype=np.complex128)
+
+gamma3 = np.array([[0, 0, 1j, 0],
+                   [0, 0, 0, -1j],
+                   [-1j, 0, 0, 0],
+                   [0, 1j, 0, 0]], dtype=np.complex128)
+
+gamma4 = np.array([[0, 0, 1, 0],
+                   [0, 0, 0, 1],
+                   [1, 0, 0, 0],
+                   [0, 1, 0, 0]], dtype=np.complex128)
+
+gamma5 = gamma1.dot(gamma2).dot(gamma3).dot(gamma4)
+
+# The sixteen linearly-independent products of gamma matrices, labelled as
+# they appear in correlator attribute tuples.
+Gammas = {"1": identity,
+          "g1": gamma1,
+          "g2": gamma2,
+          "g3": gamma3,
+          "g4": gamma4,
+          "g5": gamma5,
+          "g1g2": gamma1.dot(gamma2),
+          "g1g3": gamma1.dot(gamma3),
+          "g1g4": gamma1.dot(gamma4),
+          "g1g5": gamma1.dot(gamma5),
+          "g2g3": gamma2.dot(gamma3),
+          "g2g4": gamma2.dot(gamma4),
+          "g2g5": gamma2.dot(gamma5),
+          "g3g4": gamma3.dot(gamma4),
+          "g3g5": gamma3.dot(gamma5),
+          "g4g5": gamma4.dot(gamma5)}
+
+interpolators = ["1", "g1", "g2", "g3", "g4", "g5",
+                 "g1g2", "g1g3", "g1g4", "g1g5",
+                 "g2g3", "g2g4", "g2g5",
+                 "g3g4", "g3g5", "g4g5"]
+
+# Meson labels indexed by the gamma_value written by Chroma's hadspec
+# measurement code.
+mesons = ["a0", "rho_x", "rho_y", "b1_z",
+          "rho_z", "b1_y", "b1_x", "pion_2",
+          "a0_2", "rho_x_2", "rho_y_2", "a1_z",
+          "rho_z_2", "a1_y", "a1_x", "pion"]
+
+# Baryon labels indexed by the baryon_num written by Chroma's hadspec
+# measurement code.
+baryons = ["lambda_even", "sigma_star_even", "nucleon_even", "xi_even",
+           "lambda_odd", "sigma_star_odd", "nucleon_odd", "xi_odd",
+           "delta_x", "delta_y", "delta_z", "delta_t",
+           "nucleon_mixed", "sigma_mixed", "lambda_mixed", "xi_mixed"]
+
+# Current labels indexed by the current_value written by Chroma's hadspec
+# measurement code.
+hadspec_currents = ["vector_x", "vector_y", "vector_z",
+                    "axial_x", "axial_y", "axial_z"]
@@ -0,0 +1,802 @@
+"""Loading routines for correlation functions computed by external lattice
+codes (currently Chroma and UKhadron).
+
+Each loader returns a dict mapping correlator attribute tuples of the form
+(label, masses, momentum, source_type, sink_type) to numpy arrays holding one
+correlator value per timeslice. The attribute tuples can be filtered using
+the filter_correlators function in this module.
+
+Loader results are memoized by file path and modification time, so repeated
+loads of an unchanged file skip parsing entirely. The returned dicts are
+shared between such calls and should be treated as read-only.
+"""
+
+from __future__ import absolute_import, division
+
+import array
+import functools
+import multiprocessing as mp
+import os
+import struct
+
+import numpy as np
+
+try:
+    from lxml import etree as ET
+    _have_lxml = True
+    _parser = ET.XMLParser(huge_tree=True, collect_ids=False)
+
+    def _parse_xml(filename):
+        """Parses the supplied XML file and returns the root element."""
+        return ET.parse(filename, _parser).getroot()
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _have_lxml = False
+
+    def _parse_xml(filename):
+        """Parses the supplied XML file and returns the root element."""
+        return ET.parse(filename).getroot()
+
+from pyQCD import constants as const
+
+
+source_sink_types = ["Point", "Shell", "Wall"]
+
+
+def _iter_xml_records(filename, tag, parent_tag=None):
+    """Iterates over the elements with the given tag in the supplied XML
+    file, optionally requiring a given parent tag.
+
+    The file is parsed incrementally and each element is cleared once it has
+    been consumed, so peak memory use is bounded by the size of a single
+    record rather than the size of the file.
+    """
+
+    if _have_lxml:
+        context = ET.iterparse(filename, events=("end",), tag=tag)
+
+        for event, elem in context:
+            if (parent_tag is not None
+                    and elem.getparent().tag != parent_tag):
+                continue
+            yield elem
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        del context
+    else:
+        # The stdlib parser has no getparent(), so track the element stack
+        # by hand using paired start/end events.
+        stack = []
+
+        for event, elem in ET.iterparse(filename, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+
+            stack.pop()
+
+            if elem.tag == tag and (parent_tag is None or
+                                    (stack and stack[-1].tag == parent_tag)):
+                yield elem
+                elem.clear()
+
+
+if _have_lxml:
+    def _make_xpath(path):
+        """Compiles the supplied XPath expression for repeated use."""
+        return ET.XPath(path)
+else:
+    def _make_xpath(path):
+        """Emulates a compiled XPath expression on top of the stdlib
+        ElementTree API, including trailing /text() steps."""
+
+        if path.endswith("/text()"):
+            element_path = path[:-len("/text()")]
+
+            def xpath(elem, _path=element_path):
+                return [e.text for e in elem.findall(_path)]
+        else:
+            def xpath(elem, _path=path):
+                return elem.findall(_path)
+
+        return xpath
+
+
+# XPath expressions used by the loaders, compiled once at import time
+# rather than re-parsed on every findall/find call.
+_XP_MASS_1 = _make_xpath("Mass_1/text()")
+_XP_MASS_2 = _make_xpath("Mass_2/text()")
+_XP_SOURCE_TYPE = _make_xpath("SourceSinkType/source_type_1/text()")
+_XP_SINK_TYPE = _make_xpath("SourceSinkType/sink_type_1/text()")
+_XP_GAMMA_VALUE = _make_xpath("gamma_value/text()")
+_XP_BARYON_NUM = _make_xpath("baryon_num/text()")
+_XP_CURRENT_VALUE = _make_xpath("current_value/text()")
+_XP_CURRENT = _make_xpath("current/text()")
+_XP_PARTICLE_NAME = _make_xpath("particle_name/text()")
+_XP_MESONS = _make_xpath("Mesons/elem")
+_XP_MOMENTA = _make_xpath("momenta/elem")
+_XP_SINK_MOM = _make_xpath("sink_mom/text()")
+_XP_MESPROP_RE = _make_xpath("mesprop/elem/re/text()")
+_XP_BARPROP_RE = _make_xpath("barprop/elem/re/text()")
+_XP_MRES_MASS = _make_xpath("Mass/text()")
+_XP_PSEUDO_PSEUDO = _make_xpath("DWF_Pseudo_Pseudo/mesprop/text()")
+_XP_MIDPOINT_PSEUDO = _make_xpath("DWF_MidPoint_Pseudo/mesprop/text()")
+_XP_UKHADRON_PP = _make_xpath("DWF_observables/PP/text()")
+_XP_UKHADRON_PJ5Q = _make_xpath("DWF_observables/PJ5q/text()")
+
+
+def _detect_source_sink_types(propagator_pair):
+    """Determines the source and sink types from the SourceSinkType tag of
+    the supplied propagator pair element."""
+
+    raw_source_string = _XP_SOURCE_TYPE(propagator_pair)[0]
+    raw_sink_string = _XP_SINK_TYPE(propagator_pair)[0]
+
+    source_type = next(t for t in source_sink_types
+                       if t.lower() in raw_source_string.lower())
+    sink_type = next(t for t in source_sink_types
+                     if t.lower() in raw_sink_string.lower())
+
+    return source_type, sink_type
+
+
+def _parse_floats(text, dtype=np.float64):
+    """Parses a whitespace-separated string of floats into a numpy array
+    of the requested floating point type."""
+    return np.fromstring(text, dtype=np.float64,
+                         sep=" ").astype(dtype, copy=False)
+
+
+def _cache_loader(loader):
+    """Decorator memoizing a loader on the file's path and modification
+    time, along with any further arguments.
+
+    Repeated loads of an unchanged file (e.g. during interactive fitting
+    sessions) then return the previously parsed dict at no cost, while
+    edits to the file invalidate the entry through the changed
+    modification time. The cached dicts are shared between calls, so
+    callers must not mutate them.
+    """
+
+    cache = {}
+
+    @functools.wraps(loader)
+    def wrapper(filename, *args, **kwargs):
+        key = (filename, os.path.getmtime(filename), args,
+               tuple(sorted(kwargs.items())))
+        try:
+            return cache[key]
+        except KeyError:
+            out = loader(filename, *args, **kwargs)
+            cache[key] = out
+            return out
+
+    return wrapper
+
+
+def fold_correlator(correlator):
+    """Folds the supplied correlator about its temporal midpoint.
+
+    Arguments:
+      correlator (numpy.ndarray): The correlator to fold.
+
+    Returns:
+      numpy.ndarray: The folded correlator.
+    """
+
+    out = np.empty_like(correlator)
+    out[0] = correlator[0]
+
+    # Compare the real parts of the endpoints, matching
+    # TwoPoint._detect_cosh: np.sign of a complex scalar is x/|x|, so
+    # imaginary noise would misclassify every complex cosh correlator.
+    if (correlator[1].real >= 0) == (correlator[-1].real >= 0):
+        np.add(correlator[1:], correlator[:0:-1], out=out[1:])
+    else:
+        np.subtract(correlator[1:], correlator[:0:-1], out=out[1:])
+    out[1:] *= 0.5
+
+    return out
+
+
+def filter_correlators(data, label=None, masses=None, momentum=None,
+                       source_type=None, sink_type=None):
+    """Filters the supplied dict of correlators by the given attributes.
+
+    Arguments:
+      data (dict): The correlators to filter, as returned by the load_*
+        functions in this module.
+      label (str, optional): The correlator label to match.
+      masses (iterable, optional): The quark masses to match.
+      momentum (iterable, optional): The lattice momentum to match.
+      source_type (str, optional): The source type to match.
+      sink_type (str, optional): The sink type to match.
+
+    Returns:
+      numpy.ndarray or dict: The correlator(s) matching the given attributes.
+
+      If exactly one correlator matches, it is returned directly, otherwise
+      a dict of the matching correlators is returned.
+    """
+
+    if masses is not None:
+        masses = tuple(round(mass, 8) for mass in masses)
+    if momentum is not None:
+        momentum = tuple(momentum)
+
+    filtered = {attrib: correlator
+                for attrib, correlator in data.items()
+                if (label is None or attrib[0] == label)
+                and (masses is None or attrib[1] == masses)
+                and (momentum is None or attrib[2] == momentum)
+                and (source_type is None or attrib[3] == source_type)
+                and (sink_type is None or attrib[4] == sink_type)}
+
+    if len(filtered) == 1:
+        return next(iter(filtered.values()))
+    else:
+        return filtered
+
+
+@_cache_loader
+def load_chroma_hadspec(filename, fold=False, dtype=np.float64):
+    """Loads all correlators from a Chroma hadspec XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+    """
+
+    out = {}
+    out.update(load_chroma_hadspec_mesons(filename, fold, dtype))
+    out.update(load_chroma_hadspec_baryons(filename, fold, dtype))
+    out.update(load_chroma_hadspec_currents(filename, fold, dtype))
+
+    return out
+
+
+@_cache_loader
+def load_chroma_hadspec_mesons(filename, fold=False, dtype=np.float64):
+    """Loads the meson correlators from a Chroma hadspec XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The keys take the form (label, masses, momentum, source_type,
+      sink_type).
+    """
+
+    out = {}
+    source_type = sink_type = None
+
+    for propagator_pair in _iter_xml_records(filename, "elem",
+                                             "Wilson_hadron_measurements"):
+        mass_1 = float(_XP_MASS_1(propagator_pair)[0])
+        mass_2 = float(_XP_MASS_2(propagator_pair)[0])
+
+        if source_type is None:
+            source_type, sink_type \
+                = _detect_source_sink_types(propagator_pair)
+            interpolator_xpath = _make_xpath(
+                "{}_{}_Wilson_Mesons/elem".format(source_type, sink_type))
+
+        for interpolator in interpolator_xpath(propagator_pair):
+            gamma_value = int(_XP_GAMMA_VALUE(interpolator)[0])
+            label = const.mesons[gamma_value]
+
+            momenta = _XP_MOMENTA(interpolator)
+
+            for momentum in momenta:
+                sink_mom = [int(x)
+                            for x in _XP_SINK_MOM(momentum)[0].split()]
+
+                correlator = _parse_floats(
+                    " ".join(_XP_MESPROP_RE(momentum)), dtype)
+
+                if fold:
+                    correlator = fold_correlator(correlator)
+
+                attribute_tuple = (label,
+                                   (round(mass_1, 8), round(mass_2, 8)),
+                                   tuple(sink_mom), source_type, sink_type)
+                out[attribute_tuple] = correlator
+
+    return out
+
+
+class _ChromaBaryonsTarget(object):
+    """lxml parser target that extracts the baryon correlators from a Chroma
+    hadspec file.
+
+    Only the handful of tags carrying data of interest are inspected, and no
+    element tree is ever built, so the file is consumed in a single linear
+    scan instead of repeated findall walks over a parsed tree.
+    """
+
+    _text_tags = frozenset(["Mass_1", "Mass_2", "source_type_1",
+                            "sink_type_1", "baryon_num", "sink_mom", "re"])
+
+    def __init__(self, fold, dtype):
+        self._fold = fold
+        self._dtype = dtype
+        self._buf = None
+        self._values = array.array("d")
+        self._in_baryons = False
+        self._mass_1 = None
+        self._masses = None
+        self._source_type = None
+        self._sink_type = None
+        self._label = None
+        self._sink_mom = None
+        self._out = {}
+
+    def start(self, tag, attrib):
+        if tag in self._text_tags:
+            self._buf = []
+        elif tag.endswith("_Wilson_Baryons"):
+            self._in_baryons = True
+
+    def data(self, data):
+        if self._buf is not None:
+            self._buf.append(data)
+
+    def end(self, tag):
+        if self._buf is not None:
+            text = "".join(self._buf)
+            self._buf = None
+
+            if tag == "re":
+                if self._in_baryons:
+                    self._values.append(float(text))
+            elif tag == "Mass_1":
+                self._mass_1 = round(float(text), 8)
+            elif tag == "Mass_2":
+                self._masses = (self._mass_1, round(float(text), 8))
+            elif tag == "source_type_1":
+                self._source_type = next(t for t in source_sink_types
+                                         if t.lower() in text.lower())
+            elif tag == "sink_type_1":
+                self._sink_type = next(t for t in source_sink_types
+                                       if t.lower() in text.lower())
+            elif tag == "baryon_num":
+                self._label = const.baryons[int(text)]
+            elif tag == "sink_mom":
+                self._sink_mom = tuple(int(x) for x in text.split())
+        elif tag == "barprop":
+            correlator = np.frombuffer(
+                self._values, dtype=np.float64).astype(self._dtype)
+
+            if self._fold:
+                correlator = fold_correlator(correlator)
+
+            attribute_tuple = (self._label, self._masses, self._sink_mom,
+                               self._source_type, self._sink_type)
+            self._out[attribute_tuple] = correlator
+            self._values = array.array("d")
+        elif tag.endswith("_Wilson_Baryons"):
+            self._in_baryons = False
+
+    def close(self):
+        return self._out
+
+
+@_cache_loader
+def load_chroma_hadspec_baryons(filename, fold=False, dtype=np.float64):
+    """Loads the baryon correlators from a Chroma hadspec XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The keys take the form (label, masses, momentum, source_type,
+      sink_type).
+    """
+
+    if _have_lxml:
+        parser = ET.XMLParser(target=_ChromaBaryonsTarget(fold, dtype),
+                              huge_tree=True)
+        return ET.parse(filename, parser)
+
+    out = {}
+    source_type = sink_type = None
+
+    for propagator_pair in _iter_xml_records(filename, "elem",
+                                             "Wilson_hadron_measurements"):
+        mass_1 = float(_XP_MASS_1(propagator_pair)[0])
+        mass_2 = float(_XP_MASS_2(propagator_pair)[0])
+
+        if source_type is None:
+            source_type, sink_type \
+                = _detect_source_sink_types(propagator_pair)
+            interpolator_xpath = _make_xpath(
+                "{}_{}_Wilson_Baryons/elem".format(source_type, sink_type))
+
+        for interpolator in interpolator_xpath(propagator_pair):
+            baryon_num = int(_XP_BARYON_NUM(interpolator)[0])
+            label = const.baryons[baryon_num]
+
+            momenta = _XP_MOMENTA(interpolator)
+
+            for momentum in momenta:
+                sink_mom = [int(x)
+                            for x in _XP_SINK_MOM(momentum)[0].split()]
+
+                correlator = _parse_floats(
+                    " ".join(_XP_BARPROP_RE(momentum)), dtype)
+
+                if fold:
+                    correlator = fold_correlator(correlator)
+
+                attribute_tuple = (label,
+                                   (round(mass_1, 8), round(mass_2, 8)),
+                                   tuple(sink_mom), source_type, sink_type)
+                out[attribute_tuple] = correlator
+
+    return out
+
+
+@_cache_loader
+def load_chroma_hadspec_currents(filename, fold=False, dtype=np.float64):
+    """Loads the current correlators from a Chroma hadspec XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The keys take the form (label, masses, momentum, source_type,
+      sink_type).
+    """
+
+    out = {}
+    source_type = sink_type = None
+
+    for propagator_pair in _iter_xml_records(filename, "elem",
+                                             "Wilson_hadron_measurements"):
+        mass_1 = float(_XP_MASS_1(propagator_pair)[0])
+        mass_2 = float(_XP_MASS_2(propagator_pair)[0])
+
+        if source_type is None:
+            source_type, sink_type \
+                = _detect_source_sink_types(propagator_pair)
+            current_xpath = _make_xpath(
+                "{}_{}_Wilson_Currents/elem".format(source_type, sink_type))
+
+        for current in current_xpath(propagator_pair):
+            current_value = int(_XP_CURRENT_VALUE(current)[0])
+            label = const.hadspec_currents[current_value]
+
+            correlator = _parse_floats(_XP_CURRENT(current)[0], dtype)
+
+            if fold:
+                correlator = fold_correlator(correlator)
+
+            attribute_tuple = (label,
+                               (round(mass_1, 8), round(mass_2, 8)),
+                               (0, 0, 0), source_type, sink_type)
+            out[attribute_tuple] = correlator
+
+    return out
+
+
+@_cache_loader
+def load_chroma_mesonspec(filename, fold=False, dtype=np.float64):
+    """Loads the correlators from a Chroma mesonspec XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The keys take the form (label, masses, momentum, source_type,
+      sink_type).
+    """
+
+    out = {}
+    source_type = sink_type = None
+
+    for propagator_pair in _iter_xml_records(filename, "elem",
+                                             "MesonSpectroscopy"):
+        mass_1 = float(_XP_MASS_1(propagator_pair)[0])
+        mass_2 = float(_XP_MASS_2(propagator_pair)[0])
+
+        if source_type is None:
+            source_type, sink_type \
+                = _detect_source_sink_types(propagator_pair)
+
+        for interpolator in _XP_MESONS(propagator_pair):
+            label = _XP_PARTICLE_NAME(interpolator)[0]
+
+            momenta = _XP_MOMENTA(interpolator)
+
+            for momentum in momenta:
+                sink_mom = [int(x)
+                            for x in _XP_SINK_MOM(momentum)[0].split()]
+
+                correlator = _parse_floats(
+                    " ".join(_XP_MESPROP_RE(momentum)), dtype)
+
+                if fold:
+                    correlator = fold_correlator(correlator)
+
+                attribute_tuple = (label,
+                                   (round(mass_1, 8), round(mass_2, 8)),
+                                   tuple(sink_mom), source_type, sink_type)
+                out[attribute_tuple] = correlator
+
+    return out
+
+
+@_cache_loader
+def load_chroma_mres(filename, fold=False, dtype=np.float64):
+    """Loads the domain wall mres data from a Chroma XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The correlators are stored under the labels "pseudo_pseudo" and
+      "midpoint_pseudo".
+    """
+
+    out = {}
+
+    for propagator_root in _iter_xml_records(filename, "propagator"):
+        mass = float(_XP_MRES_MASS(propagator_root)[0])
+
+        pseudo_pseudo = _parse_floats(_XP_PSEUDO_PSEUDO(propagator_root)[0], dtype)
+
+        midpoint_pseudo = _parse_floats(
+            _XP_MIDPOINT_PSEUDO(propagator_root)[0], dtype)
+
+        if fold:
+            pseudo_pseudo = fold_correlator(pseudo_pseudo)
+            midpoint_pseudo = fold_correlator(midpoint_pseudo)
+
+        mass_tuple = (round(mass, 8), round(mass, 8))
+        out[("pseudo_pseudo", mass_tuple, (0, 0, 0), "Point", "Point")] \
+            = pseudo_pseudo
+        out[("midpoint_pseudo", mass_tuple, (0, 0, 0), "Point", "Point")] \
+            = midpoint_pseudo
+
+    return out
+
+
+@_cache_loader
+def load_ukhadron_mres(filename, mass, fold=False,
+                       dtype=np.float64):
+    """Loads the domain wall mres data from a UKhadron XML output file.
+
+    Arguments:
+      filename (str): The name of the XML file to load.
+      mass (float): The quark mass used in the measurement, which is not
+        recorded in the file itself.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The floating point type to store the
+        correlators with. Passing float32 halves the memory and bandwidth
+        consumed downstream at a precision well beyond that of typical
+        fits.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The correlators are stored under the labels "pseudo_pseudo" and
+      "midpoint_pseudo".
+    """
+
+    xmlroot = _parse_xml(filename)
+
+    pseudo_pseudo = _parse_floats(_XP_UKHADRON_PP(xmlroot)[0], dtype)
+    midpoint_pseudo = _parse_floats(_XP_UKHADRON_PJ5Q(xmlroot)[0], dtype)
+
+    if fold:
+        pseudo_pseudo = fold_correlator(pseudo_pseudo)
+        midpoint_pseudo = fold_correlator(midpoint_pseudo)
+
+    mass_tuple = (round(mass, 8), round(mass, 8))
+
+    return {("pseudo_pseudo", mass_tuple, (0, 0, 0), "Point", "Point"):
+            pseudo_pseudo,
+            ("midpoint_pseudo", mass_tuple, (0, 0, 0), "Point", "Point"):
+            midpoint_pseudo}
+
+
+@_cache_loader
+def load_ukhadron_mesbin(filename, byteorder, fold=False,
+                         dtype=np.complex128):
+    """Loads the meson correlators from a UKhadron binary output file.
+
+    Arguments:
+      filename (str): The name of the binary file to load.
+      byteorder (str): The endianness of the data in the file, either
+        "little" or "big".
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      dtype (numpy.dtype, optional): The complex type to store the
+        correlators with. Passing complex64 halves the memory and
+        bandwidth consumed downstream.
+
+    Returns:
+      dict: Maps correlator attribute tuples to numpy correlator arrays.
+
+      The correlators are labelled by the pair of gamma matrix interpolators
+      used at source and sink.
+    """
+
+    endian = "<" if byteorder == "little" else ">"
+
+    # The file is read in a single call and parsed out of a memoryview:
+    # header fields come from struct.unpack_from and correlator blocks
+    # from zero-copy np.frombuffer slices, rather than a long sequence of
+    # small read() calls.
+    with open(filename, "rb") as binary_file:
+        raw_bytes = binary_file.read()
+
+    buf = memoryview(raw_bytes)
+    mom_num = struct.unpack_from(endian + "i", buf, 0)[0]
+    offset = 4
+
+    out = {}
+
+    for i in range(mom_num):
+        px, py, pz, Nmu, Nnu, T \
+            = struct.unpack_from(endian + "6i", buf, offset + 16)
+        offset += 40
+
+        raw = np.frombuffer(raw_bytes, dtype=endian + "c16",
+                            count=T * Nmu * Nnu, offset=offset)
+        offset += raw.nbytes
+        correlators = raw.reshape(T, Nmu, Nnu).transpose(1, 2, 0)
+        correlators = np.ascontiguousarray(correlators).astype(
+            dtype, copy=False)
+
+        for mu in range(Nmu):
+            for nu in range(Nnu):
+                correlator = correlators[mu, nu]
+
+                if fold:
+                    correlator = fold_correlator(correlator)
+
+                attribute_tuple \
+                    = ((const.interpolators[mu],
+                        const.interpolators[nu]),
+                       (), (px, py, pz), "Point", "Point")
+                out[attribute_tuple] = correlator
+
+    return out
+
+
+def _apply_loader(args):
+    """Helper for the *_many loaders; must live at module level so that
+    multiprocessing can pickle it."""
+
+    loader, filename, kwargs = args
+    return loader(filename, **kwargs)
+
+
+def _load_many(loader, filenames, kwargs, nprocs):
+    """Dispatches the supplied loader over the given files with a process
+    pool, returning a dict mapping each filename to its correlators. The
+    pool never holds more workers than there are files, and a single file
+    is loaded in-process to avoid pool start-up costs."""
+
+    filenames = list(filenames)
+
+    if len(filenames) < 2:
+        return dict(zip(filenames,
+                        [loader(filename, **kwargs)
+                         for filename in filenames]))
+
+    if nprocs is None:
+        nprocs = mp.cpu_count()
+
+    pool = mp.Pool(min(nprocs, len(filenames)))
+    try:
+        results = pool.map(_apply_loader,
+                           [(loader, filename, kwargs)
+                            for filename in filenames])
+    finally:
+        pool.close()
+        pool.join()
+
+    return dict(zip(filenames, results))
+
+
+def load_chroma_hadspec_many(filenames, fold=False, dtype=np.float64,
+                             nprocs=None):
+    """Loads several Chroma hadspec XML output files in parallel.
+
+    Arguments:
+      filenames (iterable): The names of the XML files to load.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      nprocs (int, optional): The number of worker processes to use,
+        defaulting to the machine's core count.
+
+    Returns:
+      dict: Maps each filename to the dict returned by
+      load_chroma_hadspec.
+    """
+
+    return _load_many(load_chroma_hadspec, filenames,
+                      {"fold": fold, "dtype": dtype}, nprocs)
+
+
+def load_chroma_mesonspec_many(filenames, fold=False, dtype=np.float64,
+                               nprocs=None):
+    """Loads several Chroma mesonspec XML output files in parallel.
+
+    Arguments are as for load_chroma_hadspec_many.
+
+    Returns:
+      dict: Maps each filename to the dict returned by
+      load_chroma_mesonspec.
+    """
+
+    return _load_many(load_chroma_mesonspec, filenames,
+                      {"fold": fold, "dtype": dtype}, nprocs)
+
+
+def load_chroma_mres_many(filenames, fold=False, dtype=np.float64,
+                          nprocs=None):
+    """Loads the mres data from several Chroma XML output files in
+    parallel.
+
+    Arguments are as for load_chroma_hadspec_many.
+
+    Returns:
+      dict: Maps each filename to the dict returned by load_chroma_mres.
+    """
+
+    return _load_many(load_chroma_mres, filenames,
+                      {"fold": fold, "dtype": dtype}, nprocs)
@@ -0,0 +1,177 @@
+from __future__ import absolute_import
+
+import struct
+
+import numpy as np
+import pytest
+
+from pyQCD import interfaces
+
+
+@pytest.fixture
+def hadspec_file(tmpdir):
+    """Writes a minimal Chroma hadspec XML file and returns its path"""
+
+    correlator = " ".join(
+        "<elem><re>{}</re><im>0.0</im></elem>".format(float(t + 1))
+        for t in range(8))
+    current = " ".join(str(float(t + 1)) for t in range(8))
+
+    xml = """<?xml version="1.0"?>
+<hadspec>
+  <Wilson_hadron_measurements>
+    <elem>
+      <Mass_1>0.4</Mass_1>
+      <Mass_2>0.4</Mass_2>
+      <SourceSinkType>
+        <source_type_1>point_source</source_type_1>
+        <sink_type_1>point_sink</sink_type_1>
+      </SourceSinkType>
+      <Point_Point_Wilson_Mesons>
+        <elem>
+          <gamma_value>15</gamma_value>
+          <momenta>
+            <elem>
+              <sink_mom>0 0 0</sink_mom>
+              <mesprop>{correlator}</mesprop>
+            </elem>
+          </momenta>
+        </elem>
+      </Point_Point_Wilson_Mesons>
+      <Point_Point_Wilson_Baryons>
+        <elem>
+          <baryon_num>2</baryon_num>
+          <momenta>
+            <elem>
+              <sink_mom>0 0 0</sink_mom>
+              <barprop>{correlator}</barprop>
+            </elem>
+          </momenta>
+        </elem>
+      </Point_Point_Wilson_Baryons>
+      <Point_Point_Wilson_Currents>
+        <elem>
+          <current_value>0</current_value>
+          <current>{current}</current>
+        </elem>
+      </Point_Point_Wilson_Currents>
+    </elem>
+  </Wilson_hadron_measurements>
+</hadspec>"""
+
+    path = tmpdir.join("hadspec.dat.xml")
+    path.write(xml.format(correlator=correlator, current=current))
+    return str(path)
+
+
+@pytest.fixture
+def mesbin_file(tmpdir):
+    """Writes a minimal UKhadron meson binary file and returns its path"""
+
+    T, Nmu, Nnu = 8, 2, 2
+    path = tmpdir.join("mesons.bin")
+
+    with open(str(path), "wb") as binary_file:
+        binary_file.write(struct.pack("<i", 1))
+        binary_file.write(struct.pack("<4i", 0, 0, 0, 0))
+        binary_file.write(struct.pack("<6i", 0, 0, 0, Nmu, Nnu, T))
+        for t in range(T):
+            for mu in range(Nmu):
+                for nu in range(Nnu):
+                    binary_file.write(struct.pack("<2d", float(t), 0.0))
+
+    return str(path)
+
+
+class TestFoldCorrelator(object):
+
+    def test_fold_cosh(self):
+        """Test folding of a cosh-like correlator"""
+        correlator = np.cosh(0.5 * (np.arange(8) - 4.0))
+        folded = interfaces.fold_correlator(correlator)
+
+        assert folded.shape == correlator.shape
+        assert np.allclose(folded[1:],
+                           0.5 * (correlator[1:] + correlator[:0:-1]))
+        assert np.allclose(folded[0], correlator[0])
+
+    def test_fold_cosh_complex(self):
+        """Test folding of a complex cosh-like correlator carrying
+        imaginary noise, as produced by the FFT momentum projection"""
+        correlator = (np.cosh(0.5 * (np.arange(8) - 4.0))
+                      + 1e-9j * np.arange(8))
+        folded = interfaces.fold_correlator(correlator)
+
+        assert np.allclose(folded[1:],
+                           0.5 * (correlator[1:] + correlator[:0:-1]))
+
+    def test_fold_sinh(self):
+        """Test folding of a sinh-like correlator"""
+        correlator = np.sinh(0.5 * (np.arange(8) - 4.0))
+        folded = interfaces.fold_correlator(correlator)
+
+        assert np.allclose(folded[1:],
+                           0.5 * (correlator[1:] - correlator[:0:-1]))
+
+
+class TestFilterCorrelators(object):
+
+    def test_filter(self):
+        """Test filtering of correlator dicts by attribute"""
+        data = {("pion", (0.4, 0.4), (0, 0, 0), "Point", "Point"):
+                np.arange(8),
+                ("pion", (0.4, 0.4), (1, 0, 0), "Point", "Point"):
+                np.arange(8) * 2,
+                ("rho_x", (0.4, 0.4), (0, 0, 0), "Point", "Point"):
+                np.arange(8) * 3}
+
+        filtered = interfaces.filter_correlators(data, label="pion")
+        assert len(filtered) == 2
+
+        filtered = interfaces.filter_correlators(data, label="pion",
+                                                 momentum=(1, 0, 0))
+        assert np.allclose(filtered, np.arange(8) * 2)
+
+
+class TestLoadChromaHadspec(object):
+
+    def test_load_mesons(self, hadspec_file):
+        """Test loading of hadspec meson correlators"""
+        data = interfaces.load_chroma_hadspec_mesons(hadspec_file)
+
+        key = ("pion", (0.4, 0.4), (0, 0, 0), "Point", "Point")
+        assert key in data
+        assert np.allclose(data[key], np.arange(8) + 1.0)
+
+    def test_load_baryons(self, hadspec_file):
+        """Test loading of hadspec baryon correlators"""
+        data = interfaces.load_chroma_hadspec_baryons(hadspec_file)
+
+        assert len(data) == 1
+        correlator = list(data.values())[0]
+        assert np.allclose(correlator, np.arange(8) + 1.0)
+
+    def test_load_currents(self, hadspec_file):
+        """Test loading of hadspec current correlators"""
+        data = interfaces.load_chroma_hadspec_currents(hadspec_file)
+
+        key = ("vector_x", (0.4, 0.4), (0, 0, 0), "Point", "Point")
+        assert key in data
+        assert np.allclose(data[key], np.arange(8) + 1.0)
+
+    def test_load_all(self, hadspec_file):
+        """Test loading of all hadspec correlators at once"""
+        data = interfaces.load_chroma_hadspec(hadspec_file)
+        assert len(data) == 3
+
+
+class TestLoadUkhadronMesbin(object):
+
+    def test_load(self, mesbin_file):
+        """Test loading of UKhadron binary meson correlators"""
+        data = interfaces.load_ukhadron_mesbin(mesbin_file, "little")
+
+        assert len(data) == 4
+        key = (("1", "1"), (), (0, 0, 0), "Point", "Point")
+        assert key in data
+        assert np.allclose(data[key].real, np.arange(8))
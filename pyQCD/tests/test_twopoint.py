@@ -0,0 +1,220 @@
+from __future__ import absolute_import
+
+import numpy as np
+import pytest
+
+from pyQCD import constants as const
+from pyQCD import twopoint
+
+
+@pytest.fixture
+def propagators():
+    """Creates a pair of random propagators on a tiny lattice"""
+
+    np.random.seed(0)
+    shape = (4, 2, 2, 2, 4, 4, 3, 3)
+    prop1 = (np.random.standard_normal(shape)
+             + 1j * np.random.standard_normal(shape))
+    prop2 = (np.random.standard_normal(shape)
+             + 1j * np.random.standard_normal(shape))
+    return prop1, prop2
+
+
+def reference_correlator(prop1, gamma1, prop2, gamma2):
+    """Computes the spatial meson correlator site-by-site using plain
+    12x12 matrix algebra, as a reference for _compute_correlator"""
+
+    T, L = prop1.shape[:2]
+    id3 = np.identity(3)
+    g5 = np.kron(np.asarray(const.gamma5), id3)
+    g1 = np.kron(np.asarray(gamma1), id3)
+    g2 = np.kron(np.asarray(gamma2), id3)
+
+    out = np.zeros((T, L, L, L), dtype=np.complex128)
+
+    for index in np.ndindex(T, L, L, L):
+        s1 = prop1[index].transpose(0, 2, 1, 3).reshape(12, 12)
+        s2 = prop2[index].transpose(0, 2, 1, 3).reshape(12, 12)
+        adjoint1 = g5.dot(np.conj(s1.T)).dot(g5)
+        out[index] = np.trace(g1.dot(adjoint1).dot(g2).dot(s2))
+
+    return out
+
+
+class TestGetAllMomenta(object):
+
+    def test_shell_sizes(self):
+        """Test enumeration of equivalent lattice momenta"""
+        px, py, pz = twopoint._get_all_momenta(0, 4)
+        assert len(px) == 1
+        assert (px[0], py[0], pz[0]) == (0, 0, 0)
+
+        px, py, pz = twopoint._get_all_momenta(1, 4)
+        assert len(px) == 6
+
+    def test_cache(self):
+        """Test that repeated lookups return the cached arrays"""
+        first = twopoint._get_all_momenta(2, 4)
+        second = twopoint._get_all_momenta(2, 4)
+        assert first[0] is second[0]
+
+
+class TestComputeCorrelator(object):
+
+    def test_against_reference(self, propagators):
+        """Test the fused contraction against naive matrix algebra"""
+        prop1, prop2 = propagators
+        gamma1 = const.Gammas["g5"]
+        gamma2 = const.Gammas["g4g5"]
+
+        correlator = twopoint._compute_correlator(prop1, gamma1,
+                                                  prop2, gamma2)
+        reference = reference_correlator(prop1, gamma1, prop2, gamma2)
+
+        assert np.allclose(correlator, reference)
+
+
+class TestComputeAllMesonCorrelators(object):
+
+    def test_against_single_pair(self, propagators):
+        """Test the fused all-pairs sweep against a single-pair result"""
+        prop1, prop2 = propagators
+
+        all_correlators = twopoint.compute_all_meson_correlators(prop1,
+                                                                 prop2)
+        single = twopoint.compute_meson_corr(prop1, prop2, "g5", "g4g5")
+
+        assert len(all_correlators) == 256
+        assert np.allclose(all_correlators[("g5_g4g5", (0, 0, 0))],
+                           single[(0, 0, 0)])
+
+
+@pytest.fixture
+def twopoint_container():
+    """Creates a container holding a single cosh-form pion correlator"""
+
+    T, L = 16, 4
+    mass = 0.5
+
+    t = np.arange(T)
+    correlator = np.cosh(mass * (t - T / 2))
+
+    container = twopoint.TwoPoint(T, L)
+    container.add_correlator(correlator, "pion", (0.4, 0.4), (0, 0, 0),
+                             "Point", "Point")
+    return container
+
+
+class TestTwoPoint(object):
+
+    def test_add_get_correlator(self, twopoint_container):
+        """Test correlator storage and retrieval"""
+        correlator = twopoint_container.get_correlator("pion")
+
+        assert correlator.shape == (16,)
+
+        key = ("pion", (0.4, 0.4), (0, 0, 0), "Point", "Point")
+        assert key in twopoint_container.data
+
+    def test_attribute_access(self, twopoint_container):
+        """Test attribute-style correlator lookup"""
+        correlator = twopoint_container.pion_px0_py0_pz0_M0p4_M0p4_Point_Point
+        assert np.allclose(correlator,
+                           twopoint_container.get_correlator("pion"))
+
+        with pytest.raises(AttributeError):
+            twopoint_container.nonexistent
+
+    def test_compute_effmass(self, twopoint_container):
+        """Test the vectorized effective mass solve on exact cosh data"""
+        effmass = twopoint_container.compute_effmass("pion")
+
+        assert effmass.shape == (16,)
+        assert np.allclose(effmass, 0.5)
+
+    def test_compute_effmass_complex(self, twopoint_container):
+        """Test the effective mass solve on a complex-dtype correlator,
+        as produced by the meson contraction routines"""
+        correlator = twopoint_container.get_correlator("pion")
+        twopoint_container.add_correlator(
+            correlator.astype(np.complex128), "pion_complex", (0.4, 0.4),
+            (0, 0, 0), "Point", "Point")
+
+        effmass = twopoint_container.compute_effmass("pion_complex")
+
+        assert effmass.dtype.kind == "f"
+        assert np.allclose(effmass, 0.5)
+
+    def test_fold(self):
+        """Test folding of symmetric and antisymmetric correlators"""
+        t = np.arange(8)
+        cosh_correlator = np.cosh(0.5 * (t - 4.0)) + 0.01 * t
+        folded = twopoint.TwoPoint._fold(cosh_correlator)
+        assert np.allclose(folded[1:],
+                           0.5 * (cosh_correlator[1:]
+                                  + cosh_correlator[:0:-1]))
+
+        sinh_correlator = np.sinh(0.5 * (t - 4.0))
+        folded = twopoint.TwoPoint._fold(sinh_correlator)
+        assert np.allclose(folded[1:],
+                           0.5 * (sinh_correlator[1:]
+                                  - sinh_correlator[:0:-1]))
+
+    def test_arithmetic(self, twopoint_container):
+        """Test the arithmetic dunder methods"""
+        key = ("pion", (0.4, 0.4), (0, 0, 0), "Point", "Point")
+        correlator = twopoint_container.data[key]
+
+        doubled = twopoint_container + twopoint_container
+        assert np.allclose(doubled.data[key], 2 * correlator)
+
+        halved = twopoint_container / 2
+        assert np.allclose(halved.data[key], 0.5 * correlator)
+
+        squared = twopoint_container ** 2
+        assert np.allclose(squared.data[key], correlator ** 2)
+
+        difference = twopoint_container - twopoint_container
+        assert np.allclose(difference.data[key], 0.0)
+
+    def test_compute_energy(self, twopoint_container):
+        """Test the single-exponential energy fit"""
+        energy = twopoint_container.compute_energy((1, 15), [25.0, 0.6],
+                                                   label="pion")
+        assert np.allclose(energy, 0.5, atol=1e-6)
+
+    def test_save_load(self, twopoint_container, tmpdir):
+        """Test the save/load round trip"""
+        filename = str(tmpdir.join("correlators.npz"))
+        twopoint_container.save(filename)
+
+        loaded = twopoint.TwoPoint.load(filename)
+        assert loaded.T == twopoint_container.T
+        assert loaded.L == twopoint_container.L
+        assert np.allclose(loaded.get_correlator("pion"),
+                           twopoint_container.get_correlator("pion"))
+
+
+class TestComputeMesonCorr(object):
+
+    def test_zero_momentum(self, propagators):
+        """Test that zero momentum projection matches the spatial sum"""
+        prop1, prop2 = propagators
+
+        correlators = twopoint.compute_meson_corr(prop1, prop2, "g5", "g5")
+        spatial = twopoint._compute_correlator(prop1, const.Gammas["g5"],
+                                               prop2, const.Gammas["g5"])
+
+        assert list(correlators.keys()) == [(0, 0, 0)]
+        assert np.allclose(correlators[(0, 0, 0)],
+                           spatial.sum(axis=(1, 2, 3)))
+
+    def test_multiple_momenta(self, propagators):
+        """Test projection onto several momenta at once"""
+        prop1, prop2 = propagators
+
+        correlators = twopoint.compute_meson_corr(
+            prop1, prop2, "g5", "g5", momenta=[(0, 0, 0), (1, 0, 0)])
+
+        assert len(correlators) == 2
+        assert correlators[(1, 0, 0)].shape == (4,)
@@ -0,0 +1,1358 @@
+"""Computation and analysis routines for hadron two-point correlation
+functions.
+
+The functions in this module operate on spin-colour propagators stored as
+numpy arrays of shape (T, L, L, L, 4, 4, 3, 3), with the spin indices
+preceding the colour indices, and produce correlators in the same dict
+format as the loaders in pyQCD.interfaces. The TwoPoint class collects such
+correlators and provides effective mass, energy and dispersion fits.
+"""
+
+from __future__ import absolute_import, division
+
+import functools
+import math
+import re
+import warnings
+
+import numpy as np
+import scipy.optimize as spop
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+try:
+    import cupy
+except ImportError:
+    cupy = None
+
+try:
+    from scipy import fft as scipy_fft
+except ImportError:
+    scipy_fft = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+from pyQCD import constants as const
+from pyQCD import interfaces
+
+
+# Cache of equivalent-momentum lookups keyed by (p2, L), shared by all
+# correlator computations on the same lattice.
+_momenta_cache = {}
+
+# Cache of einsum contraction paths keyed by subscripts and operand
+# shapes, so repeated contractions on same-shaped propagators skip the
+# path search.
+_einsum_path_cache = {}
+
+
+def _get_einsum_path(subscripts, *shapes):
+    """Returns an optimal einsum contraction path for the given
+    subscripts and operand shapes, computing it once per combination."""
+
+    key = (subscripts,) + shapes
+
+    try:
+        return _einsum_path_cache[key]
+    except KeyError:
+        # broadcast_to gives correctly-shaped operands without
+        # allocating; einsum_path only inspects their shapes.
+        operands = [np.broadcast_to(np.complex128(0), shape)
+                    for shape in shapes]
+        path = np.einsum_path(subscripts, *operands, optimize="optimal")[0]
+        _einsum_path_cache[key] = path
+        return path
+
+# Labels for the 256 interpolator pairs, indexed by source and sink
+# position in const.interpolators and materialized once at import rather
+# than re-formatted inside every sweep.
+_pair_labels = [["{}_{}".format(source_name, sink_name)
+                 for sink_name in const.interpolators]
+                for source_name in const.interpolators]
+
+# Patterns for parsing flat correlator attribute names back into
+# attribute tuples, compiled once at import instead of per lookup.
+_ATTR_RE = re.compile(
+    r'(\w+)_px(\d+)_py(\d+)_pz(\d+)(_\w+)_([a-zA-Z]+)_([a-zA-Z]+)')
+_MASS_RE = re.compile(r'M(\d+p\d+)')
+
+# Cache of correlator attribute tuples keyed by their raw arguments, so
+# repeated inserts with the same attributes skip the rounding and tuple
+# conversions.
+_key_cache = {}
+
+
+def _make_key(label, masses, momentum, source_type, sink_type):
+    """Builds the hashable attribute tuple under which a correlator is
+    stored, memoizing repeated attribute combinations."""
+
+    raw = (label, masses, momentum, source_type, sink_type)
+
+    try:
+        return _key_cache[raw]
+    except KeyError:
+        key = (label, tuple([round(mass, 8) for mass in masses]),
+               tuple(momentum), source_type, sink_type)
+        _key_cache[raw] = key
+        return key
+    except TypeError:
+        # Unhashable (e.g. list) arguments bypass the cache.
+        return (label, tuple([round(mass, 8) for mass in masses]),
+                tuple(momentum), source_type, sink_type)
+
+
+# Stacks with at least this many elements are evaluated through numexpr
+# when it is installed; its chunked, multithreaded evaluation only pays
+# off once the operands spill out of cache.
+_NUMEXPR_THRESHOLD = 1 << 16
+
+# Numpy equivalents of the stack arithmetic expressions, used when
+# numexpr is not installed or the stacks are small.
+_STACK_OPS = {"a + b": np.add,
+              "a - b": np.subtract,
+              "-a": np.negative,
+              "a / b": np.divide,
+              "a ** b": np.power}
+
+
+def _stack_arithmetic(expression, a, b=None):
+    """Evaluates an elementwise expression over correlator stacks,
+    routing large stacks through numexpr when it is installed.
+
+    The expression refers to its operands as a and b.
+    """
+
+    if numexpr is not None and a.size >= _NUMEXPR_THRESHOLD:
+        return numexpr.evaluate(expression, local_dict={"a": a, "b": b})
+
+    op = _STACK_OPS[expression]
+    return op(a) if b is None else op(a, b)
+
+
+# Cache of Fourier phase matrices keyed by (L, momenta), used to project
+# small momentum sets with one matrix multiply instead of a full FFT.
+_phase_matrix_cache = {}
+
+# Momentum sets at least this large are projected through the spatial
+# FFT; smaller sets go through the cached phase matrix.
+_FFT_MOMENTA_THRESHOLD = 8
+
+
+def _get_phase_matrix(L, momenta):
+    """Returns the (L**3, len(momenta)) matrix of Fourier phases
+    exp(-2j pi p.x / L) for the given momenta, cached per momentum set.
+
+    The sign convention matches np.fft.fftn, so both projection paths
+    produce identical momentum-space correlators.
+    """
+
+    key = (L, tuple(tuple(p) for p in momenta))
+
+    try:
+        return _phase_matrix_cache[key]
+    except KeyError:
+        sites = np.indices((L, L, L)).reshape(3, L ** 3)
+        exponents = np.dot(sites.T, np.transpose(momenta))
+        phases = np.exp(-2j * np.pi / L * exponents)
+        _phase_matrix_cache[key] = phases
+        return phases
+
+
+def _get_all_momenta(p2, L):
+    """Returns the lattice momenta whose squared magnitude equals p2.
+
+    Arguments:
+      p2 (int): The squared magnitude of the required momenta.
+      L (int): The spatial extent of the lattice.
+
+    Returns:
+      tuple: Three numpy arrays holding the (wrapped) x, y and z momentum
+        components of the matching momenta.
+    """
+
+    try:
+        return _momenta_cache[(p2, L)]
+    except KeyError:
+        components = np.arange(-L // 2, L // 2)
+        gx = components[:, None, None]
+        gy = components[None, :, None]
+        gz = components[None, None, :]
+        ix, iy, iz = np.nonzero(gx * gx + gy * gy + gz * gz == p2)
+
+        out = (components[ix] % L, components[iy] % L, components[iz] % L)
+        _momenta_cache[(p2, L)] = out
+        return out
+
+
+# Reused device-side staging buffers for the GPU backend, keyed by
+# transfer slot and shape, so repeated contractions on same-shaped
+# propagators skip device reallocation.
+_device_buffer_cache = {}
+
+
+def _to_device(array, slot):
+    """Copies a host propagator into a cached device buffer, reusing the
+    allocation across transfers of the same shape."""
+
+    key = (slot, array.shape)
+
+    try:
+        buf = _device_buffer_cache[key]
+    except KeyError:
+        buf = cupy.empty(array.shape, dtype=np.complex128)
+        _device_buffer_cache[key] = buf
+
+    buf.set(array)
+    return buf
+
+
+def _get_backend(use_gpu):
+    """Returns the array namespace to compute with: cupy when a GPU has
+    been requested, numpy otherwise."""
+
+    if use_gpu:
+        if cupy is None:
+            raise ImportError("GPU backend requested, but cupy is not "
+                              "installed")
+        return cupy
+    return np
+
+
+def prop_adjoint(propagator):
+    """Computes the hermitian adjoint of the supplied propagator, wrapped
+    in gamma5 factors so that it propagates in the reverse direction.
+
+    Arguments:
+      propagator (numpy.ndarray): The propagator to take the adjoint of,
+        with shape (T, L, L, L, 4, 4, 3, 3).
+
+    Returns:
+      numpy.ndarray: The adjoint propagator, with the same shape.
+
+    The conjugate is the only full-size intermediate: the spin and
+    colour transposes of the hermitian conjugation are folded into the
+    contraction's index pattern instead of materializing transposed
+    copies.
+    """
+
+    g5 = const.gamma5
+
+    subscripts = 'ik,txyzlkba,lj->txyzijab'
+    path = _get_einsum_path(subscripts, g5.shape, propagator.shape,
+                            g5.shape)
+    return np.einsum(subscripts, g5, np.conj(propagator), g5,
+                     optimize=path)
+
+
+def spin_prod(matrix, propagator):
+    """Multiplies the supplied propagator on the left by the given spin
+    matrix.
+
+    Arguments:
+      matrix (numpy.ndarray): The 4x4 spin matrix to multiply by.
+      propagator (numpy.ndarray): The propagator to multiply, with shape
+        (T, L, L, L, 4, 4, 3, 3).
+
+    Returns:
+      numpy.ndarray: The resulting propagator, with the same shape and
+        C-contiguous layout, so downstream contractions and FFTs read
+        dense site blocks rather than strided views.
+    """
+
+    matrix = np.asarray(matrix)
+
+    subscripts = 'ij,txyzjkab->txyzikab'
+    path = _get_einsum_path(subscripts, matrix.shape, propagator.shape)
+    return np.einsum(subscripts, matrix, propagator, optimize=path)
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _contract_sites(left, propagator1, right, propagator2, out):
+        """Accumulates the site-local spin-colour trace over propagators
+        flattened to shape (N, 4, 4, 3, 3), parallelized over all N sites
+        rather than timeslices only. The gamma matrices are sparse, so
+        zero entries of the interpolating matrices are skipped before the
+        innermost loops."""
+
+        for n in numba.prange(propagator1.shape[0]):
+            acc = 0.0 + 0.0j
+            for i in range(4):
+                for k in range(4):
+                    lik = left[i, k]
+                    if lik == 0:
+                        continue
+                    for j in range(4):
+                        for l in range(4):
+                            rjl = right[j, l]
+                            if rjl == 0:
+                                continue
+                            for a in range(3):
+                                for b in range(3):
+                                    acc += (
+                                        lik * rjl
+                                        * propagator1[
+                                            n, j, k, b, a].conjugate()
+                                        * propagator2[n, l, i, b, a])
+            out[n] = acc
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _contract_sites_all(lefts, rights, propagator1, propagator2, out):
+        """Accumulates all 256 interpolator-pair traces in one streaming
+        pass over the lattice: each site's propagator blocks are read from
+        memory once, contracted into a local spin tensor, and mapped onto
+        every channel from there."""
+
+        T, X, Y, Z = propagator1.shape[:4]
+
+        for t in numba.prange(T):
+            blocks = np.empty((4, 4, 4, 4), dtype=np.complex128)
+
+            for x in range(X):
+                for y in range(Y):
+                    for z in range(Z):
+                        for i in range(4):
+                            for k in range(4):
+                                for j in range(4):
+                                    for l in range(4):
+                                        acc = 0.0 + 0.0j
+                                        for a in range(3):
+                                            for b in range(3):
+                                                acc += (
+                                                    propagator1[
+                                                        t, x, y, z,
+                                                        j, k, b, a
+                                                    ].conjugate()
+                                                    * propagator2[
+                                                        t, x, y, z,
+                                                        l, i, b, a])
+                                        blocks[i, k, j, l] = acc
+
+                        for g in range(16):
+                            for h in range(16):
+                                acc = 0.0 + 0.0j
+                                for i in range(4):
+                                    for k in range(4):
+                                        lgik = lefts[g, i, k]
+                                        if lgik == 0:
+                                            continue
+                                        for j in range(4):
+                                            for l in range(4):
+                                                rhjl = rights[h, j, l]
+                                                if rhjl == 0:
+                                                    continue
+                                                acc += (lgik * rhjl
+                                                        * blocks[i, k,
+                                                                 j, l])
+                                out[g, h, t, x, y, z] = acc
+
+    @numba.njit(cache=True, fastmath=True)
+    def _cosh_residuals(b, t, Ct, err, T):
+        """Computes the residuals of the symmetric two-exponential fit in
+        a single fused pass, with no intermediate arrays."""
+
+        out = np.empty(t.shape[0])
+        for i in range(t.shape[0]):
+            e = math.exp(-b[1] * t[i]) + math.exp(-b[1] * (T - t[i]))
+            out[i] = (Ct[i] - b[0] * e) / err[i]
+        return out
+
+    @numba.njit(parallel=True, cache=True)
+    def _effmass_kernel(ratios, a, b, guess_mass, cosh_form):
+        """Newton-solves the effective mass ratio equation independently
+        on every timeslice, parallelized with prange."""
+
+        T = ratios.shape[0]
+        mass = np.empty(T)
+
+        for t in numba.prange(T):
+            m = guess_mass
+            for iteration in range(50):
+                if cosh_form:
+                    u, du = math.cosh(m * a[t]), a[t] * math.sinh(m * a[t])
+                    v, dv = math.cosh(m * b[t]), b[t] * math.sinh(m * b[t])
+                else:
+                    u, du = math.sinh(m * a[t]), a[t] * math.cosh(m * a[t])
+                    v, dv = math.sinh(m * b[t]), b[t] * math.cosh(m * b[t])
+
+                step = (u / v - ratios[t]) / ((du * v - u * dv) / (v * v))
+                m -= step
+
+                if abs(step) < 1e-12:
+                    break
+
+            mass[t] = m
+
+        return mass
+
+    @numba.njit(cache=True, fastmath=True)
+    def _sinh_residuals(b, t, Ct, err, T):
+        """Computes the residuals of the antisymmetric two-exponential fit
+        in a single fused pass, with no intermediate arrays."""
+
+        out = np.empty(t.shape[0])
+        for i in range(t.shape[0]):
+            e = math.exp(-b[1] * t[i]) - math.exp(-b[1] * (T - t[i]))
+            out[i] = (Ct[i] - b[0] * e) / err[i]
+        return out
+
+    @numba.njit(cache=True, fastmath=True)
+    def _cosh_jacobian(b, t, Ct, err, T):
+        """Computes the Jacobian of the symmetric two-exponential fit
+        residuals."""
+
+        out = np.empty((t.shape[0], 2))
+        for i in range(t.shape[0]):
+            e1 = math.exp(-b[1] * t[i])
+            e2 = math.exp(-b[1] * (T - t[i]))
+            out[i, 0] = -(e1 + e2) / err[i]
+            out[i, 1] = b[0] * (t[i] * e1 + (T - t[i]) * e2) / err[i]
+        return out
+
+    @numba.njit(cache=True, fastmath=True)
+    def _sinh_jacobian(b, t, Ct, err, T):
+        """Computes the Jacobian of the antisymmetric two-exponential fit
+        residuals."""
+
+        out = np.empty((t.shape[0], 2))
+        for i in range(t.shape[0]):
+            e1 = math.exp(-b[1] * t[i])
+            e2 = math.exp(-b[1] * (T - t[i]))
+            out[i, 0] = -(e1 - e2) / err[i]
+            out[i, 1] = b[0] * (t[i] * e1 - (T - t[i]) * e2) / err[i]
+        return out
+
+
+def _compute_correlator(propagator1, gamma1, propagator2, gamma2, xp=np):
+    """Computes the spatial correlator
+
+    C(t, x) = Tr[gamma1 * adjoint(propagator1) * gamma2 * propagator2]
+
+    for all lattice sites, with the trace taken over spin and colour.
+
+    The adjoint's gamma5 factors are absorbed into the interpolating
+    matrices and the hermitian conjugation into the index pattern of the
+    contraction, so neither the adjoint propagator nor the
+    gamma-multiplied propagators are ever materialized. When numba is
+    installed the contraction runs through a compiled per-site kernel;
+    otherwise it falls back to a batched trace over fused 12x12
+    spin-colour site blocks.
+
+    The xp argument selects the array namespace (numpy or cupy) to
+    contract with.
+
+    Both propagators are brought into C-contiguous complex128 layout on
+    entry, so the site-local spin-colour blocks sit in adjacent cache
+    lines and the contraction (and any subsequent FFT) runs on dense
+    buffers rather than strided views.
+    """
+
+    g5 = const.gamma5
+    left = np.dot(np.asarray(gamma1), g5)
+    right = np.dot(g5, np.asarray(gamma2))
+
+    propagator1 = np.ascontiguousarray(propagator1, dtype=np.complex128)
+    propagator2 = np.ascontiguousarray(propagator2, dtype=np.complex128)
+
+    if xp is np and numba is not None:
+        shape = propagator1.shape
+        out = np.empty(shape[0] * shape[1] * shape[2] * shape[3],
+                       dtype=np.complex128)
+        _contract_sites(np.asarray(left, dtype=np.complex128),
+                        propagator1.reshape(-1, 4, 4, 3, 3),
+                        np.asarray(right, dtype=np.complex128),
+                        propagator2.reshape(-1, 4, 4, 3, 3),
+                        out)
+        return out.reshape(shape[:4])
+
+    if xp is cupy:
+        propagator1 = _to_device(propagator1, 0)
+        propagator2 = _to_device(propagator2, 1)
+
+    # Fuse (spin, colour) into single row and column indices of 12x12
+    # site blocks, rows (i, a) by columns (j, b) for the left factor and
+    # the transposed pairing for the right, so the remaining contraction
+    # is a batched matrix trace that maps onto BLAS-style kernels.
+    shape1 = propagator1.shape
+    blocks1 = xp.einsum(
+        'ik,txyzjkba->txyziajb', xp.asarray(left),
+        xp.conj(xp.asarray(propagator1)),
+        optimize=_get_einsum_path('ik,txyzjkba->txyziajb', left.shape,
+                                  shape1))
+    blocks2 = xp.einsum(
+        'jl,txyzliba->txyzjbia', xp.asarray(right),
+        xp.asarray(propagator2),
+        optimize=_get_einsum_path('jl,txyzliba->txyzjbia', right.shape,
+                                  propagator2.shape))
+
+    blocks1 = blocks1.reshape(-1, 12, 12)
+    blocks2 = blocks2.reshape(-1, 12, 12)
+
+    return xp.einsum('nij,nji->n', blocks1, blocks2).reshape(shape1[:4])
+
+
+def _resolve_gamma(interpolator):
+    """Maps an interpolator label to its gamma matrix, passing matrices
+    through unchanged."""
+
+    if isinstance(interpolator, str):
+        return const.Gammas[interpolator]
+    return interpolator
+
+
+def _extract_momenta(mom_correlator, momenta, average_momenta, fold):
+    """Extracts the requested momentum projections from a momentum-space
+    correlator of shape (T, L, L, L)."""
+
+    T, L = mom_correlator.shape[:2]
+    mom_flat = mom_correlator.reshape(T, L * L * L)
+    out = {}
+
+    for momentum in momenta:
+        momentum = tuple(momentum)
+
+        if average_momenta:
+            p2 = momentum[0] ** 2 + momentum[1] ** 2 + momentum[2] ** 2
+            px, py, pz = _get_all_momenta(p2, L)
+            correlator = mom_flat[:, (px * L + py) * L + pz].mean(axis=1)
+        else:
+            flat_index = ((momentum[0] % L) * L
+                          + momentum[1] % L) * L + momentum[2] % L
+            correlator = mom_flat[:, flat_index]
+
+        if fold:
+            correlator = interfaces.fold_correlator(correlator)
+
+        out[momentum] = correlator
+
+    return out
+
+
+def compute_meson_corr(propagator1, propagator2, source_interpolator,
+                       sink_interpolator, momenta=(0, 0, 0),
+                       average_momenta=True, fold=False, use_gpu=False):
+    """Computes the meson correlator(s) specified by the supplied
+    interpolators, projected onto the given momenta.
+
+    Arguments:
+      propagator1 (numpy.ndarray): The first spin-colour propagator, with
+        shape (T, L, L, L, 4, 4, 3, 3).
+      propagator2 (numpy.ndarray): The second spin-colour propagator.
+      source_interpolator (str or numpy.ndarray): The interpolating
+        operator at the source, either as a label in constants.Gammas or
+        as a 4x4 spin matrix.
+      sink_interpolator (str or numpy.ndarray): The interpolating operator
+        at the sink.
+      momenta (iterable, optional): One or more lattice momenta to project
+        onto.
+      average_momenta (bool, optional): Whether to average over momenta
+        with the same squared magnitude.
+      fold (bool, optional): Whether to fold the correlators about their
+        temporal midpoints.
+      use_gpu (bool, optional): Whether to run the contraction and the
+        momentum-space FFT on the GPU via cupy. Requires cupy to be
+        installed.
+
+    Returns:
+      dict: Maps momentum tuples to numpy correlator arrays.
+    """
+
+    source_interpolator = _resolve_gamma(source_interpolator)
+    sink_interpolator = _resolve_gamma(sink_interpolator)
+
+    if not isinstance(momenta[0], (list, tuple)):
+        momenta = [momenta]
+
+    xp = _get_backend(use_gpu)
+
+    spatial_correlator = _compute_correlator(propagator1, source_interpolator,
+                                             propagator2, sink_interpolator,
+                                             xp)
+    mom_correlator = xp.fft.fftn(spatial_correlator, axes=(1, 2, 3))
+
+    if xp is not np:
+        mom_correlator = cupy.asnumpy(mom_correlator)
+
+    return _extract_momenta(mom_correlator, momenta, average_momenta, fold)
+
+
+def compute_meson_corr256(propagator1, propagator2, momenta=(0, 0, 0),
+                          average_momenta=True, fold=False,
+                          num_threads=None):
+    """Computes the meson correlators for all 256 interpolator pairs.
+
+    Arguments are as for compute_meson_corr, less the interpolators, plus:
+
+      num_threads (int, optional): The number of threads to contract
+        with. Defaults to the executor's own choice.
+
+    Returns:
+      dict: Maps (label, momentum) tuples to numpy correlator arrays,
+      where label identifies the source and sink interpolators.
+    """
+
+    if not isinstance(momenta[0], (list, tuple)):
+        momenta = [momenta]
+
+    interpolator_pairs = [(source_name, sink_name)
+                          for source_name in const.interpolators
+                          for sink_name in const.interpolators]
+
+    def contract_pair(pair):
+        return _compute_correlator(propagator1, const.Gammas[pair[0]],
+                                   propagator2, const.Gammas[pair[1]])
+
+    # The per-pair contractions release the GIL inside numpy and numba,
+    # so threads scale them across cores while all workers share the one
+    # in-memory copy of each propagator; no data is pickled or forked.
+    if ThreadPoolExecutor is not None:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            spatial_correlators = list(executor.map(contract_pair,
+                                                    interpolator_pairs))
+    else:
+        spatial_correlators = [contract_pair(pair)
+                               for pair in interpolator_pairs]
+
+    # A single batched transform over the stacked correlators amortizes
+    # the FFT setup across all 256 channels (and threads it, when scipy
+    # is available).
+    stacked = np.stack(spatial_correlators)
+
+    if scipy_fft is not None:
+        mom_correlators = scipy_fft.fftn(stacked, axes=(2, 3, 4), workers=-1)
+    else:
+        mom_correlators = np.fft.fftn(stacked, axes=(2, 3, 4))
+
+    out = {}
+
+    for index, mom_correlator in enumerate(mom_correlators):
+        label = _pair_labels[index // 16][index % 16]
+        correlators = _extract_momenta(mom_correlator, momenta,
+                                       average_momenta, fold)
+        for momentum, correlator in correlators.items():
+            out[(label, momentum)] = correlator
+
+    return out
+
+
+def compute_all_meson_correlators(propagator1, propagator2,
+                                  momenta=(0, 0, 0), average_momenta=True,
+                                  fold=False):
+    """Computes the meson correlators for all 256 interpolator pairs in a
+    single fused contraction.
+
+    Arguments are as for compute_meson_corr, less the interpolators.
+
+    Returns:
+      dict: Maps (label, momentum) tuples to numpy correlator arrays,
+      where label identifies the source and sink interpolators.
+    """
+
+    if not isinstance(momenta[0], (list, tuple)):
+        momenta = [momenta]
+
+    g5 = const.gamma5
+    gammas = np.stack([np.asarray(const.Gammas[name])
+                       for name in const.interpolators])
+    lefts = np.einsum('gik,kl->gil', gammas, g5)
+    rights = np.einsum('ij,hjk->hik', g5, gammas)
+
+    propagator1 = np.ascontiguousarray(propagator1, dtype=np.complex128)
+    propagator2 = np.ascontiguousarray(propagator2, dtype=np.complex128)
+
+    # The colour trace of the propagator pair is identical for every
+    # interpolator pair, so it is factored out and computed exactly once;
+    # the resulting site-local spin blocks are then mapped onto all 256
+    # channels, instead of re-contracting the full propagators per
+    # channel. The sweep is memory-bound, and the numba kernel keeps the
+    # blocks in thread-local storage so each propagator element makes a
+    # single trip from DRAM.
+    if numba is not None:
+        spatial_correlators = np.empty((16, 16) + propagator1.shape[:4],
+                                       dtype=np.complex128)
+        _contract_sites_all(lefts, rights, propagator1, propagator2,
+                            spatial_correlators)
+    else:
+        meson_blocks = np.einsum('txyzjkba,txyzliba->txyzikjl',
+                                 np.conj(propagator1), propagator2)
+        spatial_correlators = np.einsum('gik,hjl,txyzikjl->ghtxyz',
+                                        lefts, rights, meson_blocks,
+                                        optimize='greedy')
+
+    if scipy_fft is not None:
+        mom_correlators = scipy_fft.fftn(spatial_correlators,
+                                         axes=(3, 4, 5), workers=-1)
+    else:
+        mom_correlators = np.fft.fftn(spatial_correlators, axes=(3, 4, 5))
+
+    out = {}
+
+    for g in range(16):
+        for h in range(16):
+            label = _pair_labels[g][h]
+            correlators = _extract_momenta(mom_correlators[g, h], momenta,
+                                           average_momenta, fold)
+            for momentum, correlator in correlators.items():
+                out[(label, momentum)] = correlator
+
+    return out
+
+
+class TwoPoint(object):
+    """Encapsulates a collection of two-point correlation functions on a
+    single lattice, keyed by the same attribute tuples as the loaders in
+    pyQCD.interfaces, and provides fitting routines for them.
+
+    The correlators are stored contiguously in a single (N, T) array, so
+    operations across the whole collection (arithmetic, folding,
+    resampling) can run as one vectorized pass rather than one small
+    kernel per correlator.
+
+    Attributes:
+      T (int): The temporal extent of the lattice.
+      L (int): The spatial extent of the lattice.
+      data (dict): Maps correlator attribute tuples of the form
+        (label, masses, momentum, source_type, sink_type) to row views of
+        the stacked correlator storage.
+    """
+
+    def __init__(self, T, L):
+        """Constructor, creating an empty container for the given lattice
+        shape.
+
+        Arguments:
+          T (int): The temporal extent of the lattice.
+          L (int): The spatial extent of the lattice.
+        """
+
+        self.T = T
+        self.L = L
+        self._keys = []
+        self._values = None
+        self.data = {}
+
+    def _set_correlator(self, key, correlator):
+        """Inserts or replaces a row of the stacked correlator storage,
+        promoting the storage dtype when required, and refreshes the dict
+        of row views."""
+
+        correlator = np.asarray(correlator)
+
+        if self._values is not None:
+            dtype = np.promote_types(self._values.dtype, correlator.dtype)
+            if dtype != self._values.dtype:
+                self._values = self._values.astype(dtype)
+
+        if key in self.data:
+            self._values[self._keys.index(key)] = correlator
+        elif self._values is None:
+            self._values = np.array([correlator])
+            self._keys.append(key)
+        else:
+            self._values = np.vstack([self._values, correlator])
+            self._keys.append(key)
+
+        self.data = dict(zip(self._keys, self._values))
+
+    def add_correlator(self, data, label, masses=(), momentum=(0, 0, 0),
+                       source_type=None, sink_type=None, projected=True,
+                       fold=False):
+        """Adds a correlator to the container.
+
+        Arguments:
+          data (numpy.ndarray): The correlator data. If projected, this
+            should have shape (T,); otherwise it should be a spatial
+            correlator of shape (T, L, L, L), which is projected onto the
+            supplied momentum before being stored.
+          label (str): The correlator label.
+          masses (iterable, optional): The quark masses of the correlator.
+          momentum (iterable, optional): The lattice momentum of the
+            correlator. When the data is unprojected this may also be an
+            iterable of momenta, which are all projected from one
+            spatial transform and stored individually.
+          source_type (str, optional): The source type of the correlator.
+          sink_type (str, optional): The sink type of the correlator.
+          projected (bool, optional): Whether the data has already been
+            projected onto the supplied momentum.
+          fold (bool, optional): Whether to fold the correlator about its
+            temporal midpoint.
+        """
+
+        if projected:
+            correlators = {tuple(momentum): np.asarray(data)}
+        else:
+            if isinstance(momentum[0], (list, tuple)):
+                momenta = [tuple(p) for p in momentum]
+            else:
+                momenta = [tuple(momentum)]
+
+            correlators = dict(zip(momenta,
+                                   self._project_correlator(data, momenta)))
+
+        for mom, correlator in correlators.items():
+            if fold:
+                correlator = TwoPoint._fold(correlator)
+
+            self._set_correlator(_make_key(label, masses, mom, source_type,
+                                           sink_type), correlator)
+
+    def get_correlator(self, label=None, masses=None, momentum=None,
+                       source_type=None, sink_type=None):
+        """Returns the correlator(s) matching the given attributes.
+
+        Arguments are as for interfaces.filter_correlators.
+
+        Returns:
+          numpy.ndarray or dict: The matching correlator(s).
+        """
+
+        return interfaces.filter_correlators(self.data, label, masses,
+                                             momentum, source_type,
+                                             sink_type)
+
+    def compute_all_meson_correlators(self, propagator1, propagator2,
+                                      momenta=(0, 0, 0),
+                                      average_momenta=True, fold=False,
+                                      masses=(), source_type=None,
+                                      sink_type=None):
+        """Computes and stores the meson correlators for every source and
+        sink interpolator pair.
+
+        Arguments are as for the module-level
+        compute_all_meson_correlators, plus the masses and source and sink
+        types to store the correlators under.
+        """
+
+        correlators = compute_all_meson_correlators(propagator1,
+                                                    propagator2, momenta,
+                                                    average_momenta, fold)
+
+        for (label, momentum), correlator in correlators.items():
+            self.add_correlator(correlator, label, masses, momentum,
+                                source_type, sink_type)
+
+    def compute_effmass(self, label=None, masses=None, momentum=None,
+                        source_type=None, sink_type=None, guess_mass=1.0):
+        """Computes the effective mass of the specified correlator.
+
+        The effective mass at each timeslice solves
+
+        C(t) / C(t + 1) = f(m (t - T/2)) / f(m (t + 1 - T/2)),
+
+        with f either cosh or sinh depending on the symmetry of the
+        correlator. All timeslices are solved together with a vectorized
+        Newton iteration; if this fails to produce finite masses the
+        simple log effective mass is returned instead.
+
+        Arguments:
+          label (str, optional): The label of the correlator to use.
+          masses (iterable, optional): The quark masses of the correlator
+            to use.
+          momentum (iterable, optional): The momentum of the correlator
+            to use.
+          source_type (str, optional): The source type of the correlator
+            to use.
+          sink_type (str, optional): The sink type of the correlator
+            to use.
+          guess_mass (float, optional): The initial Newton iterate.
+
+        Returns:
+          numpy.ndarray: The effective mass at each timeslice.
+        """
+
+        correlator = self.get_correlator(label, masses, momentum,
+                                         source_type, sink_type)
+
+        T = self.T
+
+        # The shifted correlator is just a view one element along, so the
+        # ratios need no rolled (concatenated) copy of the correlator.
+        ratios = np.empty_like(correlator)
+        np.divide(correlator[:-1], correlator[1:], out=ratios[:-1])
+        ratios[-1] = correlator[-1] / correlator[0]
+
+        timeslices = np.arange(T, dtype=np.float64)
+        a = timeslices - T / 2
+        b = timeslices + 1 - T / 2
+
+        cosh_form = TwoPoint._detect_cosh(correlator)
+
+        # The compiled kernel is specialized for float ratios; complex
+        # correlators take the numpy iteration below, which runs in the
+        # ratios' own dtype.
+        if numba is not None and ratios.dtype.kind == "f":
+            mass = _effmass_kernel(ratios, a, b, float(guess_mass),
+                                   cosh_form)
+        else:
+            # Iterate in the ratios' dtype so complex correlators stay
+            # complex through the update; the final np.abs recovers the
+            # real mass either way.
+            mass = np.full(T, guess_mass, dtype=ratios.dtype)
+
+            with np.errstate(over="ignore", invalid="ignore",
+                             divide="ignore"):
+                for iteration in range(50):
+                    if cosh_form:
+                        u, du = np.cosh(mass * a), a * np.sinh(mass * a)
+                        v, dv = np.cosh(mass * b), b * np.sinh(mass * b)
+                    else:
+                        u, du = np.sinh(mass * a), a * np.cosh(mass * a)
+                        v, dv = np.sinh(mass * b), b * np.cosh(mass * b)
+
+                    step = (u / v - ratios) / ((du * v - u * dv) / v ** 2)
+                    mass -= step
+
+                    if np.max(np.abs(step)) < 1e-12:
+                        break
+
+        if not np.all(np.isfinite(mass)):
+            return np.log(np.abs(ratios))
+
+        return np.abs(mass)
+
+    def fit_correlator(self, fit_function, fit_range, initial_parameters,
+                       correlator_std=None, postprocess_function=None,
+                       label=None, masses=None, momentum=None,
+                       source_type=None, sink_type=None, jacobian=None):
+        """Fits the specified function to the specified correlator.
+
+        Arguments:
+          fit_function (callable): The function computing the fit
+            residuals, with signature (b, t, Ct, err).
+          fit_range (iterable): The first and one-past-last timeslices to
+            fit between.
+          initial_parameters (iterable): The initial fit parameters.
+          correlator_std (numpy.ndarray, optional): The standard deviation
+            of the correlator at each timeslice.
+          postprocess_function (callable, optional): Applied to the fitted
+            parameters before they are returned.
+          label, masses, momentum, source_type, sink_type: Select the
+            correlator to fit, as for get_correlator.
+          jacobian (callable, optional): Computes the Jacobian of the
+            residuals, with the same signature as fit_function. When
+            omitted the Jacobian is estimated by finite differences,
+            costing one residual evaluation per parameter per step.
+
+        Returns:
+          The fitted parameters, postprocessed if a postprocess function
+          was given.
+        """
+
+        correlator = self.get_correlator(label, masses, momentum,
+                                         source_type, sink_type)
+
+        if correlator_std is None:
+            correlator_std = np.ones(self.T)
+
+        if jacobian is None:
+            jacobian = "2-point"
+
+        t = np.arange(self.T)
+
+        x = t[fit_range[0]:fit_range[1]]
+        y = correlator[fit_range[0]:fit_range[1]]
+        err = correlator_std[fit_range[0]:fit_range[1]]
+
+        result = spop.least_squares(fit_function, initial_parameters,
+                                    jac=jacobian, args=(x, y, err),
+                                    method="trf")
+
+        if result.status <= 0:
+            warnings.warn("fit failed to converge", RuntimeWarning)
+
+        if postprocess_function is None:
+            return result.x
+        else:
+            return postprocess_function(result.x)
+
+    def compute_energy(self, fit_range, initial_parameters,
+                       correlator_std=None, label=None, masses=None,
+                       momentum=None, source_type=None, sink_type=None):
+        """Computes the ground state energy of the specified correlator by
+        fitting a single cosh or sinh to it.
+
+        Arguments are as for fit_correlator, less the fit and postprocess
+        functions.
+
+        Returns:
+          float: The fitted ground state energy.
+        """
+
+        correlator = self.get_correlator(label, masses, momentum,
+                                         source_type, sink_type)
+        T = self.T
+
+        cosh_form = TwoPoint._detect_cosh(correlator)
+        sign = 1.0 if cosh_form else -1.0
+
+        if numba is not None:
+            # The cosh and sinh specializations are compiled once at
+            # import; here they are only selected and bound to T.
+            kernel, jacobian_kernel \
+                = ((_cosh_residuals, _cosh_jacobian) if cosh_form
+                   else (_sinh_residuals, _sinh_jacobian))
+
+            def fit_function(b, t, Ct, err):
+                return kernel(b, t, Ct, err, T)
+
+            def jacobian(b, t, Ct, err):
+                return jacobian_kernel(b, t, Ct, err, T)
+
+            return self.fit_correlator(fit_function, fit_range,
+                                       initial_parameters, correlator_std,
+                                       lambda b: b[1], label, masses,
+                                       momentum, source_type, sink_type,
+                                       jacobian)
+        else:
+            combine = np.add if cosh_form else np.subtract
+            scratch = [None]
+
+            def fit_function(b, t, Ct, err):
+                # Chained out= ufuncs keep this to one fresh allocation
+                # per call (the returned residuals); the optimizer calls
+                # it hundreds of times per fit.
+                tmp = scratch[0]
+                if tmp is None or tmp.shape != t.shape:
+                    tmp = scratch[0] = np.empty(t.shape[0])
+
+                out = np.multiply(t, -b[1])
+                np.exp(out, out=out)
+
+                np.subtract(T, t, out=tmp)
+                np.multiply(tmp, -b[1], out=tmp)
+                np.exp(tmp, out=tmp)
+
+                combine(out, tmp, out=out)
+                np.multiply(out, -b[0], out=out)
+                np.add(out, Ct, out=out)
+                np.divide(out, err, out=out)
+                return out
+
+        def jacobian(b, t, Ct, err):
+            e1 = np.exp(-b[1] * t)
+            e2 = np.exp(-b[1] * (T - t))
+            return np.stack(
+                [-(e1 + sign * e2) / err,
+                 b[0] * (t * e1 + sign * (T - t) * e2) / err], axis=1)
+
+        return self.fit_correlator(fit_function, fit_range,
+                                   initial_parameters, correlator_std,
+                                   lambda b: b[1], label, masses, momentum,
+                                   source_type, sink_type, jacobian)
+
+    def compute_energy_sqr(self, fit_range, initial_parameters,
+                           correlator_std=None, label=None, masses=None,
+                           momentum=None, source_type=None, sink_type=None):
+        """Computes the square of the ground state energy of the specified
+        correlator.
+
+        Arguments are as for compute_energy.
+
+        Returns:
+          float: The square of the fitted ground state energy.
+        """
+
+        return self.compute_energy(fit_range, initial_parameters,
+                                   correlator_std, label, masses, momentum,
+                                   source_type, sink_type) ** 2
+
+    def compute_c_square(self, fit_ranges, initial_parameters, momenta,
+                         correlator_stds=None, label=None, masses=None,
+                         source_type=None, sink_type=None):
+        """Computes the square of the speed of light from the dispersion
+        relation of the specified correlators.
+
+        Arguments:
+          fit_ranges (iterable): The fit ranges to use, the first for the
+            zero-momentum correlator and one for each supplied momentum.
+          initial_parameters (iterable): The initial fit parameters.
+          momenta (iterable): The non-zero momenta to use.
+          correlator_stds (iterable, optional): The standard deviations of
+            the correlators, ordered as the fit ranges.
+          label, masses, source_type, sink_type: Select the correlators to
+            fit, as for get_correlator.
+
+        Returns:
+          numpy.ndarray: The speed of light squared at each momentum.
+        """
+
+        if correlator_stds is None:
+            correlator_stds = [None] * (len(momenta) + 1)
+
+        E0_square = self.compute_energy_sqr(fit_ranges[0],
+                                            initial_parameters,
+                                            correlator_stds[0], label,
+                                            masses, (0, 0, 0), source_type,
+                                            sink_type)
+
+        momenta_array = np.asarray(momenta, dtype=np.float64)
+        p_squares = (2 * np.pi / self.L) ** 2 \
+            * np.einsum('ij,ij->i', momenta_array, momenta_array)
+
+        out = np.zeros(len(momenta))
+
+        for i, p in enumerate(momenta):
+            E_square = self.compute_energy_sqr(fit_ranges[i + 1],
+                                               initial_parameters,
+                                               correlator_stds[i + 1],
+                                               label, masses, p,
+                                               source_type, sink_type)
+
+            out[i] = (E_square - E0_square) / p_squares[i]
+
+        return out
+
+    def save(self, filename):
+        """Saves the container to a numpy zip archive.
+
+        Each correlator is written as its own named array, so single
+        correlators can be read back from the archive without unpickling
+        the whole collection. Keys that cannot round-trip through a flat
+        name fall back to the legacy pickled-dict layout.
+
+        Arguments:
+          filename (str): The name of the file to save to.
+        """
+
+        arrays = {}
+
+        try:
+            for key, correlator in self.data.items():
+                name = TwoPoint._get_correlator_name(*key)
+                if TwoPoint._get_correlator_parameters(name) != key:
+                    raise ValueError(name)
+                arrays[name] = correlator
+        except (ValueError, TypeError, IndexError):
+            np.savez(filename, T=self.T, L=self.L,
+                     data=np.array(self.data, dtype=object))
+            return
+
+        np.savez(filename, T=self.T, L=self.L, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a container previously written by save.
+
+        Arguments:
+          filename (str): The name of the file to load from.
+
+        Returns:
+          TwoPoint: The loaded container.
+        """
+
+        numpy_archive = np.load(filename, allow_pickle=True)
+
+        out = cls(int(numpy_archive["T"]), int(numpy_archive["L"]))
+
+        if "data" in numpy_archive.files:
+            for key, correlator in numpy_archive["data"].item().items():
+                out._set_correlator(key, correlator)
+        else:
+            for name in numpy_archive.files:
+                if name not in ("T", "L"):
+                    out._set_correlator(
+                        TwoPoint._get_correlator_parameters(name),
+                        numpy_archive[name])
+
+        return out
+
+    def _project_correlator(self, spatial_correlator, momenta):
+        """Projects the supplied spatial correlator of shape (T, L, L, L)
+        onto the supplied momenta.
+
+        Small momentum sets are projected with a single matrix multiply
+        against a cached phase matrix; larger sets go through one spatial
+        FFT, after which each projection is a free lookup into the
+        transformed cube.
+
+        Returns:
+          list: One projected correlator per momentum.
+        """
+
+        if len(momenta) < _FFT_MOMENTA_THRESHOLD:
+            phases = _get_phase_matrix(self.L, momenta)
+            flat = spatial_correlator.reshape(self.T, self.L ** 3)
+            return list(np.dot(flat, phases).T)
+
+        mom_correlator = TwoPoint._project_all_momenta(spatial_correlator)
+
+        px, py, pz = np.asarray(momenta).T % self.L
+        return list(mom_correlator[:, px, py, pz].T)
+
+    @staticmethod
+    def _project_all_momenta(spatial_correlator):
+        """Projects the supplied spatial correlator of shape (T, L, L, L)
+        onto every lattice momentum at once with a spatial FFT.
+
+        The momentum (px, py, pz) sits at index (px % L, py % L, pz % L)
+        of the returned cube.
+        """
+
+        return np.fft.fftn(spatial_correlator, axes=(1, 2, 3))
+
+    @staticmethod
+    def _detect_cosh(correlator):
+        """Determines whether the supplied correlator is symmetric (cosh
+        form) or antisymmetric (sinh form) about its temporal midpoint."""
+
+        return ((correlator[1].real >= 0)
+                == (correlator[-1].real >= 0))
+
+    @staticmethod
+    def _fold(correlator):
+        """Folds the supplied correlator about its temporal midpoint."""
+
+        if TwoPoint._detect_cosh(correlator):
+            return TwoPoint._fold_cosh(correlator)
+        return TwoPoint._fold_sinh(correlator)
+
+    @staticmethod
+    def _fold_cosh(correlator):
+        """Folds a symmetric correlator about its temporal midpoint."""
+
+        out = np.empty_like(correlator)
+        out[0] = correlator[0]
+
+        half = correlator[1:]
+        np.add(half, half[::-1], out=out[1:])
+        out[1:] *= 0.5
+
+        return out
+
+    @staticmethod
+    def _fold_sinh(correlator):
+        """Folds an antisymmetric correlator about its temporal
+        midpoint."""
+
+        out = np.empty_like(correlator)
+        out[0] = correlator[0]
+
+        half = correlator[1:]
+        np.subtract(half, half[::-1], out=out[1:])
+        out[1:] *= 0.5
+
+        return out
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _get_correlator_name(label, masses, momentum, source_type,
+                             sink_type):
+        """Builds the flat attribute name under which the correlator with
+        the given attributes is exposed.
+
+        The attribute tuples passed in are hashable, so repeated lookups
+        of the same correlator reuse the memoized name."""
+
+        name = "{}_px{}_py{}_pz{}".format(label, momentum[0], momentum[1],
+                                          momentum[2])
+        for mass in masses:
+            name += "_M{}".format(round(mass, 4)).replace(".", "p")
+        name += "_{}_{}".format(source_type, sink_type)
+
+        return name
+
+    @staticmethod
+    def _get_correlator_parameters(attribute_name):
+        """Parses a flat correlator attribute name back into the
+        corresponding attribute tuple."""
+
+        matched = _ATTR_RE.match(attribute_name)
+
+        if matched is None:
+            raise ValueError("Unable to parse correlator name: {}"
+                             .format(attribute_name))
+
+        match = matched.groups()
+
+        label = match[0]
+        momentum = [int(p) for p in match[1:4]]
+
+        mass_attributes = _MASS_RE.findall(match[4])
+        masses = [float(mass.replace("p", ".")) for mass in mass_attributes]
+
+        return (label, tuple(masses), tuple(momentum), match[5], match[6])
+
+    def __getattr__(self, name):
+        """Exposes each stored correlator as an attribute named by
+        _get_correlator_name."""
+
+        try:
+            key = TwoPoint._get_correlator_parameters(name)
+        except ValueError:
+            raise AttributeError("{!r} object has no attribute {!r}"
+                                 .format(type(self).__name__, name))
+
+        try:
+            return self.data[key]
+        except KeyError:
+            raise AttributeError("{!r} object has no attribute {!r}"
+                                 .format(type(self).__name__, name))
+
+    def _replace_values(self, values):
+        """Builds a new container sharing this one's keys but holding the
+        supplied correlator stack."""
+
+        out = TwoPoint(self.T, self.L)
+        out._keys = list(self._keys)
+        out._values = values
+        out.data = dict(zip(out._keys, out._values))
+        return out
+
+    def __add__(self, tp):
+        if self._keys == tp._keys and self._values is not None:
+            return self._replace_values(
+                _stack_arithmetic("a + b", self._values, tp._values))
+
+        out = TwoPoint(self.T, self.L)
+
+        for key in self.data.keys():
+            out._set_correlator(key, self.data[key] + tp.data[key])
+
+        return out
+
+    def __neg__(self):
+        if self._values is None:
+            return TwoPoint(self.T, self.L)
+
+        return self._replace_values(_stack_arithmetic("-a", self._values))
+
+    def __sub__(self, tp):
+        if self._keys == tp._keys and self._values is not None:
+            return self._replace_values(
+                _stack_arithmetic("a - b", self._values, tp._values))
+
+        out = TwoPoint(self.T, self.L)
+
+        for key in self.data.keys():
+            out._set_correlator(key, self.data[key] - tp.data[key])
+
+        return out
+
+    def __div__(self, divisor):
+        if self._values is None:
+            return TwoPoint(self.T, self.L)
+
+        return self._replace_values(
+            _stack_arithmetic("a / b", self._values, divisor))
+
+    __truediv__ = __div__
+
+    def __pow__(self, exponent):
+        if self._values is None:
+            return TwoPoint(self.T, self.L)
+
+        return self._replace_values(
+            _stack_arithmetic("a ** b", self._values, exponent))